@@ -0,0 +1,237 @@
+# images.py
+# Content-hashed event image storage + a small cacheable image endpoint.
+#
+# Images are stored in UPLOAD_DIR as <sha256[:16]><ext> and events keep just
+# that file name. Because a name never changes content, the endpoint serves
+# them with `Cache-Control: immutable` and answers If-None-Match with 304, so
+# repeat views cost zero image bytes.
+#
+# Where browsers fetch images from:
+#   IMAGE_URL set    -> {IMAGE_URL}/<name> (a same-origin proxy path or a CDN;
+#                       needed for HTTPS pages, which block http:// images)
+#   IMAGE_URL unset  -> http://<host the viewer used>:{IMAGE_PORT}/<name>
+#   otherwise        -> inline data: URL (endpoint not running, HTTPS page
+#                       without IMAGE_URL, ...) so images still show, uncached
+#
+#   python images.py migrate   # one-off: move inline data: URLs out of events.json
+#   python images.py serve     # run the endpoint standalone
+
+import argparse
+import base64
+import functools
+import hashlib
+import json
+import logging
+import os
+import re
+import shutil
+import tempfile
+import threading
+import urllib.error
+import urllib.parse
+import urllib.request
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+UPLOAD_DIR = "uploads"
+# IMAGE_PORT=0 disables the in-app server (e.g. when it runs standalone)
+IMAGE_PORT = int(os.environ.get("IMAGE_PORT", "8502"))
+IMAGE_URL = os.environ.get("IMAGE_URL", "").rstrip("/")
+SERVER_NAME = "EventImages"
+
+_LOGGER = logging.getLogger(__name__)
+
+CACHE_CONTROL = "public, max-age=31536000, immutable"
+NAME_RE = re.compile(r"^([0-9a-f]{16})\.(png|jpg|jpeg)$")
+MIME = {"png": "image/png", "jpg": "image/jpeg", "jpeg": "image/jpeg"}
+
+os.makedirs(UPLOAD_DIR, exist_ok=True)
+
+# --------------------------------------
+# STORAGE
+# --------------------------------------
+def store_image(data, ext):
+    # same bytes -> same name, so it is safe to cache forever
+    digest = hashlib.sha256(data).hexdigest()[:16]
+    name = f"{digest}{ext.lower()}"
+    pth = os.path.join(UPLOAD_DIR, name)
+    if not os.path.exists(pth):
+        with open(pth, "wb") as f:
+            f.write(data)
+    return name
+
+def image_url(name):
+    if not name or name.startswith("data:"):
+        # not migrated yet: the old inline URL still works
+        return name or ""
+    if IMAGE_URL:
+        return f"{IMAGE_URL}/{name}"
+    base = _request_base_url() if _serving else None
+    if base is None:
+        return _inline_url(name)
+    return f"{base}/{name}"
+
+def _request_base_url():
+    # the endpoint on the host the viewer reached the app through
+    try:
+        import streamlit as st
+        headers = st.context.headers
+    except Exception:
+        return None
+    host = headers.get("Host") or ""
+    proto = headers.get("X-Forwarded-Proto") or "http"
+    if not host or proto != "http":
+        # HTTPS pages block http:// images; set IMAGE_URL for those
+        _warn_once("https", "HTTPS page without IMAGE_URL: serving images inline "
+                   "(uncached); set IMAGE_URL to an HTTPS proxy path or CDN")
+        return None
+    hostname = urllib.parse.urlsplit(f"//{host}").hostname
+    if ":" in hostname:
+        hostname = f"[{hostname}]"
+    return f"http://{hostname}:{IMAGE_PORT}"
+
+@functools.lru_cache(maxsize=256)
+def _inline_url(name):
+    # names are content hashes, so caching by name is safe
+    m = NAME_RE.match(name)
+    try:
+        with open(os.path.join(UPLOAD_DIR, name), "rb") as f:
+            enc = base64.b64encode(f.read()).decode()
+    except OSError:
+        return ""
+    return f"data:{MIME[m.group(2)] if m else 'image/png'};base64,{enc}"
+
+_warned = set()
+
+def _warn_once(key, msg):
+    if key not in _warned:
+        _warned.add(key)
+        _LOGGER.warning(msg)
+
+def migrate_events(events_file):
+    # older events inlined the image as a base64 data: URL, or pointed at
+    # app/static/uploads/<name>?v=...
+    with open(events_file, "r", encoding="utf-8") as f:
+        events = json.load(f)
+
+    changed = 0
+    for e in events:
+        img = e.get("image") or ""
+        if img.startswith("data:"):
+            header, _, enc = img.partition(",")
+            ext = ".jpg" if "jpeg" in header else ".png"
+            try:
+                e["image"] = store_image(base64.b64decode(enc), ext)
+            except ValueError:
+                e["image"] = ""
+        elif "/" in img:
+            e["image"] = img.split("?")[0].rsplit("/", 1)[-1]
+        else:
+            continue
+        changed += 1
+
+    if changed:
+        # write-then-rename so a reader never sees a half-written file;
+        # mkstemp creates 0600, so keep the original file's mode
+        fd, tmp = tempfile.mkstemp(dir=os.path.dirname(os.path.abspath(events_file)))
+        with os.fdopen(fd, "w", encoding="utf-8") as f:
+            json.dump(events, f, ensure_ascii=False, indent=2, default=str)
+        shutil.copymode(events_file, tmp)
+        os.replace(tmp, events_file)
+    return changed
+
+# --------------------------------------
+# ENDPOINT
+# --------------------------------------
+class ImageHandler(BaseHTTPRequestHandler):
+    # also lets start_server() recognise an already-running endpoint
+    server_version = SERVER_NAME
+    def do_HEAD(self):
+        self.serve(body=False)
+
+    def do_GET(self):
+        self.serve(body=True)
+
+    def serve(self, body):
+        name = self.path.split("?")[0].rsplit("/", 1)[-1]
+        m = NAME_RE.match(name)
+        pth = os.path.join(UPLOAD_DIR, name)
+        if not m or not os.path.isfile(pth):
+            self.send_error(404)
+            return
+
+        # the name is the content hash, so it doubles as a strong ETag
+        etag = f'"{m.group(1)}"'
+        tags = [t.strip() for t in self.headers.get("If-None-Match", "").split(",")]
+        if etag in tags or "*" in tags:
+            self.send_response(304)
+            self.send_header("ETag", etag)
+            self.send_header("Cache-Control", CACHE_CONTROL)
+            self.end_headers()
+            return
+
+        with open(pth, "rb") as f:
+            data = f.read()
+        self.send_response(200)
+        self.send_header("Content-Type", MIME[m.group(2)])
+        self.send_header("Content-Length", str(len(data)))
+        self.send_header("ETag", etag)
+        self.send_header("Cache-Control", CACHE_CONTROL)
+        self.send_header("Access-Control-Allow-Origin", "*")
+        self.end_headers()
+        if body:
+            self.wfile.write(data)
+
+    def log_message(self, format, *args):
+        pass
+
+_server = None
+_serving = False
+_tried = False
+_server_lock = threading.Lock()
+
+def _is_image_server(port):
+    try:
+        resp = urllib.request.urlopen(f"http://127.0.0.1:{port}/", timeout=2)
+    except urllib.error.HTTPError as e:
+        resp = e
+    except OSError:
+        return False
+    return (resp.headers.get("Server") or "").startswith(SERVER_NAME)
+
+def start_server(port=IMAGE_PORT):
+    # Streamlit re-executes the app script on every rerun, but this module is
+    # imported once per process, so the server starts once
+    global _server, _serving, _tried
+    if not port:
+        return None
+    with _server_lock:
+        if not _tried:
+            _tried = True
+            try:
+                _server = ThreadingHTTPServer(("", port), ImageHandler)
+            except OSError as e:
+                # fine if it is our endpoint (`python images.py serve`);
+                # anything else (e.g. a second Streamlit app) gets no URLs
+                _serving = _is_image_server(port)
+                if not _serving:
+                    _LOGGER.warning("image endpoint: port %d is taken by another "
+                                    "process (%s); serving images inline", port, e)
+                return None
+            _server.daemon_threads = True
+            threading.Thread(target=_server.serve_forever, daemon=True).start()
+            _serving = True
+    return _server
+
+
+if __name__ == "__main__":
+    p = argparse.ArgumentParser(description="Event image storage / endpoint")
+    p.add_argument("command", choices=["migrate", "serve"])
+    p.add_argument("--events", default="events.json")
+    p.add_argument("--port", type=int, default=IMAGE_PORT or 8502)
+    args = p.parse_args()
+
+    if args.command == "migrate":
+        print(f"migrated {migrate_events(args.events)} event image(s)")
+    else:
+        print(f"serving {UPLOAD_DIR}/ on :{args.port}")
+        ThreadingHTTPServer(("", args.port), ImageHandler).serve_forever()
@@ -0,0 +1,625 @@
+# loadtest.py
+# Offline concurrent-session load test for the event app.
+#
+# Drives many simulated guest / user / admin sessions through Streamlit's
+# AppTest (each session = one AppTest with its own session_state), against an
+# in-memory fake Redis and a stub LLM, and reports throughput, rerun latency
+# percentiles, memory per session and backend call rates.
+#
+# Each worker is a separate process running one AppTest rerun at a time:
+# AppTest installs a process-global mock Runtime per run, so overlapping runs
+# in one process break each other. --workers is therefore the number of
+# reruns in flight at once; all workers share one fake Redis.
+#
+#   python loadtest.py                          # work.py, 200 sessions
+#   python loadtest.py --sessions 500 --workers 8 --ticks 10
+#   python loadtest.py --app temp.py --mix 0,0,1  # admins hitting the LLM
+#
+# Nothing touches the network or the repo: the app runs in a temp copy of
+# events.json, and upstash_redis / dspy are replaced by fakes.
+
+import argparse
+import importlib
+import json
+import logging
+import math
+import multiprocessing
+import os
+import queue
+import random
+import shutil
+import sys
+import tempfile
+import threading
+import time
+import types
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+
+# --------------------------------------
+# FAKE BACKENDS
+# --------------------------------------
+_real_sleep = time.sleep
+
+
+class Counters:
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.calls = {}
+
+    def hit(self, name):
+        with self.lock:
+            self.calls[name] = self.calls.get(name, 0) + 1
+
+
+COUNTERS = Counters()      # backend calls (fake Redis, stub LLM)
+APP_EVENTS = Counters()    # things the app did that aren't backend calls
+LATENCY = {"redis": 0.0, "llm": 0.0}
+
+
+class FakeRedis:
+    # shared by every session, like the real Upstash database; run_worker()
+    # swaps in main()'s multiprocessing.Manager dict so all workers see the same data
+    _store = {}
+
+    def __init__(self, url=None, token=None, **kwargs):
+        pass
+
+    def get(self, key):
+        COUNTERS.hit("redis.get")
+        if LATENCY["redis"]:
+            _real_sleep(LATENCY["redis"])
+        return self._store.get(key)
+
+    def set(self, key, value, **kwargs):
+        COUNTERS.hit("redis.set")
+        if LATENCY["redis"]:
+            _real_sleep(LATENCY["redis"])
+        self._store[key] = value
+        return True
+
+
+class StubLM:
+    def __init__(self, model=None, api_key=None, **kwargs):
+        self.model = model
+
+    def __call__(self, prompt=None, **kwargs):
+        COUNTERS.hit("llm.call")
+        if LATENCY["llm"]:
+            _real_sleep(LATENCY["llm"])
+        # dspy.LM returns a list of completions
+        return ["A stub description generated for load testing."]
+
+
+def install_fakes():
+    redis_mod = types.ModuleType("upstash_redis")
+    redis_mod.Redis = FakeRedis
+    sys.modules["upstash_redis"] = redis_mod
+
+    dspy_mod = types.ModuleType("dspy")
+    dspy_mod.LM = StubLM
+    dspy_mod.settings = types.SimpleNamespace(configure=lambda **kwargs: None)
+    sys.modules["dspy"] = dspy_mod
+
+    os.environ.setdefault("GOOGLE_API_KEY", "loadtest")
+
+
+# --------------------------------------
+# AUTO-REFRESH INTERCEPT
+# --------------------------------------
+# The event page ends with `time.sleep(1); st.rerun()`, which would keep an
+# AppTest run looping forever. Inside the app script, sleep instead stops the
+# run cleanly; the driver then calls run() again as the next 1s refresh tick.
+def install_sleep_hook(app_path):
+    # StopException has moved between streamlit releases
+    for mod in ("streamlit.runtime.scriptrunner_utils.exceptions",
+                "streamlit.runtime.scriptrunner.exceptions",
+                "streamlit.runtime.scriptrunner.script_runner"):
+        try:
+            StopException = importlib.import_module(mod).StopException
+            break
+        except (ImportError, AttributeError):
+            continue
+    else:
+        raise RuntimeError("can't find streamlit's StopException; unsupported streamlit version")
+
+    def sleep(secs):
+        caller = sys._getframe(1).f_globals.get("__file__") or ""
+        if os.path.realpath(caller) == app_path:
+            APP_EVENTS.hit("refresh_tick")
+            raise StopException()
+        _real_sleep(secs)
+
+    time.sleep = sleep
+
+
+# --------------------------------------
+# SCRIPT-THREAD ERRORS
+# --------------------------------------
+# Failures on AppTest's script-runner thread (outside the app code) never
+# reach at.exception; they are only logged or escape the thread. Collect
+# them so Session.step can count the rerun as failed.
+SCRIPT_ERRORS = []
+
+
+class ErrorCapture(logging.Handler):
+    def emit(self, record):
+        msg = record.getMessage()
+        if record.exc_info and record.exc_info[1] is not None:
+            exc = record.exc_info[1]
+            msg = f"{msg}: {type(exc).__name__}: {exc}"
+        SCRIPT_ERRORS.append(msg)
+
+
+def install_error_capture():
+    import streamlit.testing.v1  # noqa: F401  (creates streamlit's loggers)
+
+    # streamlit loggers don't propagate, so attach to each one
+    handler = ErrorCapture(logging.ERROR)
+    for name, lg in list(logging.Logger.manager.loggerDict.items()):
+        if name.startswith("streamlit") and isinstance(lg, logging.Logger):
+            lg.addHandler(handler)
+
+    prev_hook = threading.excepthook
+
+    def excepthook(hook_args):
+        SCRIPT_ERRORS.append(f"{hook_args.exc_type.__name__}: {hook_args.exc_value}")
+        prev_hook(hook_args)
+
+    threading.excepthook = excepthook
+
+
+# --------------------------------------
+# STATS
+# --------------------------------------
+class Stats:
+    def __init__(self):
+        self.latency = {}
+        self.errors = {}
+
+    def record(self, action, secs):
+        self.latency.setdefault(action, []).append(secs)
+
+    def error(self, role, action, msg):
+        entry = self.errors.setdefault((role, action), [0, msg])
+        entry[0] += 1
+
+    def merge(self, latency, errors):
+        for action, vals in latency.items():
+            self.latency.setdefault(action, []).extend(vals)
+        for key, (n, msg) in errors.items():
+            entry = self.errors.setdefault(key, [0, msg])
+            entry[0] += n
+
+
+def percentile(sorted_vals, p):
+    if not sorted_vals:
+        return 0.0
+    # nearest-rank
+    k = max(0, min(len(sorted_vals) - 1, math.ceil(p / 100 * len(sorted_vals)) - 1))
+    return sorted_vals[k]
+
+
+def rss_bytes():
+    try:
+        with open("/proc/self/statm") as f:
+            return int(f.read().split()[1]) * os.sysconf("SC_PAGE_SIZE")
+    except (OSError, ValueError):
+        import resource
+        return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss * 1024
+
+
+# --------------------------------------
+# SESSION DRIVER
+# --------------------------------------
+class Session:
+    def __init__(self, app_path, role, rng, stats, timeout):
+        from streamlit.testing.v1 import AppTest
+
+        self.at = AppTest.from_file(app_path, default_timeout=timeout)
+        self.at.secrets["UPSTASH_REDIS_REST_URL"] = "http://fake-redis"
+        self.at.secrets["UPSTASH_REDIS_REST_TOKEN"] = "fake"
+        self.role = role
+        self.rng = rng
+        self.stats = stats
+        self.ok = True
+
+    def fail(self, action, msg):
+        self.stats.error(self.role, action, msg)
+        self.ok = False
+        return False
+
+    def step(self, action, fn=None):
+        # fn sets widget values / clicks; the timed part is the rerun itself
+        if not self.ok:
+            return False
+        try:
+            if fn is not None and fn() is False:
+                return False
+        except Exception as e:
+            # usually a widget the scenario expected isn't on the page
+            return self.fail(action, f"{type(e).__name__}: {e}")
+
+        n_errors = len(SCRIPT_ERRORS)
+        start = time.perf_counter()
+        try:
+            self.at.run()
+        except Exception as e:
+            return self.fail(action, f"{type(e).__name__}: {e}")
+        elapsed = time.perf_counter() - start
+
+        if self.at.exception:
+            return self.fail(action, self.at.exception[0].value)
+        if len(SCRIPT_ERRORS) > n_errors:
+            return self.fail(action, SCRIPT_ERRORS[n_errors])
+        if not self.at.main.children:
+            return self.fail(action, "rerun produced no elements")
+        self.stats.record(action, elapsed)
+        return True
+
+    def find(self, kind, label=None, key=None, sidebar=False):
+        root = self.at.sidebar if sidebar else self.at
+        for w in getattr(root, kind):
+            if label is not None and w.label != label:
+                continue
+            if key is not None and w.key != key:
+                continue
+            return w
+        return None
+
+    def click(self, label=None, key=None):
+        btn = self.find("button", label=label, key=key)
+        if btn is None:
+            return False
+        btn.click()
+
+    # ---- scenario steps ----
+    def login(self):
+        if not self.step("load"):
+            return
+        if self.role == "guest":
+            self.step("login", lambda: self.click("Continue as Guest"))
+            return
+
+        def fill():
+            self.at.radio[0].set_value(self.role.capitalize())
+        self.step("login_form", fill)
+
+        def creds():
+            name = "admin" if self.role == "admin" else f"user{self.rng.randint(1, 9999)}"
+            self.find("text_input", "Username").input(name)
+            self.find("text_input", "Password").input("adminpass" if self.role == "admin" else "x")
+            self.click("Login")
+        self.step("login", creds)
+
+    def browse(self, n_filters):
+        for _ in range(n_filters):
+            choice = self.rng.choice(["search", "category", "location", "status", "clear"])
+
+            def apply(choice=choice):
+                if choice == "search":
+                    self.find("text_input", "Search", sidebar=True).input(
+                        self.rng.choice(["", "conf", "meet", "a", "react"]))
+                elif choice in ("category", "location"):
+                    box = self.find("selectbox", choice.capitalize(), sidebar=True)
+                    box.select(self.rng.choice(box.options))
+                elif choice == "status":
+                    box = self.find("multiselect", "Status", sidebar=True)
+                    if box is None:
+                        return False
+                    box.set_value(self.rng.sample(box.options, self.rng.randint(0, 2)))
+                else:
+                    self.reset_filters()
+            self.step("filter", apply)
+
+    def reset_filters(self):
+        self.find("text_input", "Search", sidebar=True).input("")
+        self.find("selectbox", "Category", sidebar=True).select("All")
+        self.find("selectbox", "Location", sidebar=True).select("All")
+        status = self.find("multiselect", "Status", sidebar=True)
+        if status is not None:
+            status.set_value([])
+
+    def open_event(self):
+        views = [b for b in self.at.button if (b.key or "").startswith("view_")]
+        if not views:
+            # filters left nothing to open
+            self.step("filter", self.reset_filters)
+            views = [b for b in self.at.button if (b.key or "").startswith("view_")]
+        if not views:
+            return None
+        btn = self.rng.choice(views)
+        eid = btn.key[len("view_"):]
+        if self.step("open_event", btn.click):
+            return eid
+        return None
+
+    def chat(self, eid, ticks, send_prob):
+        joined = False
+        for _ in range(ticks):
+            if self.role == "guest":
+                self.step("refresh")
+            elif not joined:
+                joined = self.step("join", lambda: self.click("✅ Join this Event Chat"))
+            elif self.rng.random() < send_prob:
+                def send():
+                    self.find("text_input", key=f"chat_input_{eid}").input(
+                        f"hello from {self.role} {self.rng.randint(1, 1000)}")
+                    self.click(key=f"send_{eid}")
+                self.step("send", send)
+            else:
+                self.step("refresh")
+            if not self.ok:
+                return
+        self.step("back", lambda: self.click("⬅ Back to Events"))
+
+    def generate(self):
+        # only temp.py has the AI description generator
+        if self.find("button", "✨ Generate Description with AI") is None:
+            return
+
+        def ai():
+            tone = self.find("selectbox", "Select Description Tone")
+            tone.select(self.rng.choice(tone.options))
+            self.click("✨ Generate Description with AI")
+        self.step("ai_generate", ai)
+
+
+def run_session(app_path, role, seed, stats, args):
+    rng = random.Random(seed)
+    s = Session(app_path, role, rng, stats, args.timeout)
+    s.login()
+    if role == "admin":
+        s.generate()
+    s.browse(rng.randint(1, args.filters))
+    for _ in range(args.visits):
+        eid = s.open_event()
+        if eid is None:
+            break
+        s.chat(eid, args.ticks, args.send_prob)
+        s.browse(1)
+    return s
+
+
+# --------------------------------------
+# WORKDIR
+# --------------------------------------
+def make_workdir(n_events):
+    workdir = tempfile.mkdtemp(prefix="loadtest_")
+    with open(os.path.join(HERE, "events.json"), "r", encoding="utf-8") as f:
+        events = json.load(f)
+
+    if n_events and events:
+        # clone events (fresh ids, spread over dates) to scale the grid
+        base = list(events)
+        events = []
+        for i in range(n_events):
+            e = dict(base[i % len(base)])
+            e["id"] = 1_000_000 + i
+            e["title"] = f"{e['title']} #{i}"
+            e["date"] = time.strftime("%Y-%m-%d", time.localtime(time.time() + (i % 30 - 10) * 86400))
+            events.append(e)
+
+    with open(os.path.join(workdir, "events.json"), "w", encoding="utf-8") as f:
+        json.dump(events, f, indent=2)
+    return workdir, len(events)
+
+
+# --------------------------------------
+# WORKER PROCESS
+# --------------------------------------
+def run_worker(app_path, workdir, store, shard, args, results):
+    os.chdir(workdir)
+    # the image endpoint is irrelevant here and would fight over the port; a
+    # fixed IMAGE_URL keeps image_url() as cheap as in a CDN deployment
+    os.environ["IMAGE_PORT"] = "0"
+    os.environ["IMAGE_URL"] = "http://images.invalid"
+    LATENCY["redis"] = args.redis_latency_ms / 1000
+    LATENCY["llm"] = args.llm_latency_ms / 1000
+    FakeRedis._store = store
+
+    install_fakes()
+    install_sleep_hook(app_path)
+    install_error_capture()
+
+    # warm up imports / bytecode so they don't count as per-session memory
+    run_session(app_path, "guest", -1, Stats(), args)
+    COUNTERS.calls.clear()
+    APP_EVENTS.calls.clear()
+    del SCRIPT_ERRORS[:]
+    rss_before = rss_bytes()
+
+    stats = Stats()
+    start = time.time()
+    # keep every session alive until memory is measured
+    sessions = [run_session(app_path, role, seed, stats, args) for role, seed in shard]
+    end = time.time()
+
+    # plain data only: AppTest rebinds sys.modules["__main__"] to the app, so
+    # this module's classes can't be pickled from a worker
+    results.put({
+        "latency": stats.latency,
+        "errors": stats.errors,
+        "calls": dict(COUNTERS.calls),
+        "app_events": dict(APP_EVENTS.calls),
+        "start": start,
+        "end": end,
+        "sessions": len(sessions),
+        "mem": max(0, rss_bytes() - rss_before),
+    })
+
+
+# --------------------------------------
+# REPORT
+# --------------------------------------
+def redis_ipc_floor(store, n=200):
+    # the fake Redis is a Manager dict: each get/set is an IPC round-trip
+    start = time.perf_counter()
+    for _ in range(n):
+        store.get("__probe__")
+    return (time.perf_counter() - start) / n
+
+
+def report(stats, calls, app_events, ipc_floor, sessions, wall, mem_per_session, n_events, args):
+    total_runs = sum(len(v) for v in stats.latency.values())
+    reruns_per_s = total_runs / wall if wall else 0
+    out = {
+        "app": args.app,
+        "sessions": sessions,
+        "workers": args.workers,
+        "events": n_events,
+        "wall_s": round(wall, 3),
+        "reruns": total_runs,
+        "reruns_per_s": round(reruns_per_s, 2),
+        # each event-page viewer reruns once a second
+        "viewer_capacity_1hz": int(reruns_per_s),
+        "sessions_per_s": round(sessions / wall, 2) if wall else 0,
+        "mem_per_session_kb": round(mem_per_session / 1024, 1),
+        "latency_ms": {},
+        "backend": {},
+        "redis_ipc_floor_ms": round(ipc_floor * 1000, 3),
+        "app_events": {},
+        "errors": [],
+    }
+
+    all_lat = []
+    for action, vals in sorted(stats.latency.items()):
+        vals = sorted(vals)
+        all_lat.extend(vals)
+        out["latency_ms"][action] = {
+            "n": len(vals),
+            "p50": round(percentile(vals, 50) * 1000, 1),
+            "p90": round(percentile(vals, 90) * 1000, 1),
+            "p99": round(percentile(vals, 99) * 1000, 1),
+            "max": round(vals[-1] * 1000, 1),
+        }
+    all_lat.sort()
+    out["latency_ms"]["ALL"] = {
+        "n": len(all_lat),
+        "p50": round(percentile(all_lat, 50) * 1000, 1),
+        "p90": round(percentile(all_lat, 90) * 1000, 1),
+        "p99": round(percentile(all_lat, 99) * 1000, 1),
+        "max": round(all_lat[-1] * 1000, 1) if all_lat else 0.0,
+    }
+
+    for name, n in sorted(calls.items()):
+        out["backend"][name] = {
+            "calls": n,
+            "per_s": round(n / wall, 2) if wall else 0,
+            "per_rerun": round(n / total_runs, 3) if total_runs else 0,
+        }
+
+    for name, n in sorted(app_events.items()):
+        out["app_events"][name] = {
+            "count": n,
+            "per_s": round(n / wall, 2) if wall else 0,
+            "per_rerun": round(n / total_runs, 3) if total_runs else 0,
+        }
+
+    for (role, action), (n, msg) in sorted(stats.errors.items()):
+        out["errors"].append({"role": role, "action": action, "count": n, "first": str(msg)[:200]})
+
+    print(f"\n=== {out['app']}: {sessions} sessions x {args.workers} workers, {n_events} events ===")
+    print(f"wall {out['wall_s']}s | {total_runs} reruns | {out['reruns_per_s']} reruns/s "
+          f"| {out['sessions_per_s']} sessions/s | ~{out['mem_per_session_kb']} KB RSS/session")
+    print(f"capacity: ~{out['viewer_capacity_1hz']} event-page viewers at 1 rerun/s "
+          f"(reruns/s / 1 Hz per viewer)")
+    print(f"note: sessions run closed-loop and back to back (at most {args.workers} live at once,\n"
+          f"      refresh ticks without the 1s wait), so the latencies below are for a saturated\n"
+          f"      {args.workers}-worker server, not latency under hundreds of simultaneous sessions")
+    print(f"\n{'action':<14}{'n':>7}{'p50 ms':>10}{'p90 ms':>10}{'p99 ms':>10}{'max ms':>10}")
+    for action, row in out["latency_ms"].items():
+        print(f"{action:<14}{row['n']:>7}{row['p50']:>10}{row['p90']:>10}{row['p99']:>10}{row['max']:>10}")
+    print(f"\n{'backend':<20}{'calls':>8}{'per s':>10}{'per rerun':>11}")
+    for name, row in out["backend"].items():
+        print(f"{name:<20}{row['calls']:>8}{row['per_s']:>10}{row['per_rerun']:>11}")
+    print(f"(fake Redis is a multiprocessing.Manager dict: each get/set is an IPC "
+          f"round-trip of ~{out['redis_ipc_floor_ms']} ms, included in rerun latency)")
+    if out["app_events"]:
+        print(f"\n{'app event':<20}{'count':>8}{'per s':>10}{'per rerun':>11}")
+        for name, row in out["app_events"].items():
+            print(f"{name:<20}{row['count']:>8}{row['per_s']:>10}{row['per_rerun']:>11}")
+    if out["errors"]:
+        print("\nerrors:")
+        for err in out["errors"]:
+            print(f"  [{err['role']}/{err['action']}] x{err['count']}: {err['first']}")
+
+    if args.json:
+        with open(args.json, "w", encoding="utf-8") as f:
+            json.dump(out, f, indent=2)
+
+
+# --------------------------------------
+# MAIN
+# --------------------------------------
+def main():
+    p = argparse.ArgumentParser(description="Concurrent-session load test for the event app")
+    p.add_argument("--app", default="work.py", help="app script to drive (work.py or temp.py)")
+    p.add_argument("--sessions", type=int, default=200)
+    p.add_argument("--workers", type=int, default=4, help="worker processes (reruns in flight at once)")
+    p.add_argument("--mix", default="6,3,1", help="guest,user,admin weights")
+    p.add_argument("--filters", type=int, default=4, help="max filter changes per browse")
+    p.add_argument("--visits", type=int, default=2, help="event pages opened per session")
+    p.add_argument("--ticks", type=int, default=5, help="1s refresh ticks spent on each event page")
+    p.add_argument("--send-prob", type=float, default=0.3, help="chance a joined user sends per tick")
+    p.add_argument("--events", type=int, default=0, help="synthesize this many events (0 = events.json as is)")
+    p.add_argument("--redis-latency-ms", type=float, default=0.0)
+    p.add_argument("--llm-latency-ms", type=float, default=0.0)
+    p.add_argument("--timeout", type=float, default=30.0, help="per-rerun timeout (s)")
+    p.add_argument("--seed", type=int, default=0)
+    p.add_argument("--json", help="also write the report to this file")
+    args = p.parse_args()
+
+    app_path = os.path.realpath(os.path.join(HERE, args.app))
+    workdir, n_events = make_workdir(args.events)
+
+    weights = [float(w) for w in args.mix.split(",")]
+    rng = random.Random(args.seed)
+    roles = rng.choices(["guest", "user", "admin"], weights=weights, k=args.sessions)
+    jobs = [(role, args.seed * 100003 + i) for i, role in enumerate(roles)]
+    n_workers = max(1, min(args.workers, len(jobs)))
+    shards = [jobs[i::n_workers] for i in range(n_workers)]
+
+    manager = multiprocessing.Manager()
+    try:
+        store = manager.dict()
+        results = multiprocessing.Queue()
+        procs = [
+            multiprocessing.Process(target=run_worker, args=(app_path, workdir, store, shard, args, results))
+            for shard in shards
+        ]
+        for proc in procs:
+            proc.start()
+
+        # drain before join so a full queue can't block a worker on exit
+        done = []
+        while len(done) < len(procs):
+            try:
+                done.append(results.get(timeout=1))
+            except queue.Empty:
+                if not any(proc.is_alive() for proc in procs) and results.empty():
+                    break
+        for proc in procs:
+            proc.join()
+        if len(done) < len(procs):
+            sys.exit(f"{len(procs) - len(done)} worker(s) died; see the log above")
+
+        stats, calls, app_events = Stats(), {}, {}
+        for res in done:
+            stats.merge(res["latency"], res["errors"])
+            for name, n in res["calls"].items():
+                calls[name] = calls.get(name, 0) + n
+            for name, n in res["app_events"].items():
+                app_events[name] = app_events.get(name, 0) + n
+        wall = max(res["end"] for res in done) - min(res["start"] for res in done)
+        sessions = sum(res["sessions"] for res in done)
+        mem_per_session = sum(res["mem"] for res in done) / max(1, sessions)
+        report(stats, calls, app_events, redis_ipc_floor(store),
+               sessions, wall, mem_per_session, n_events, args)
+    finally:
+        manager.shutdown()
+        shutil.rmtree(workdir, ignore_errors=True)
+
+
+if __name__ == "__main__":
+    main()
@@ -6,9 +6,9 @@ import streamlit.components.v1 as components
 from datetime import datetime, date, time
 import json
 import os
-import base64
 import dspy
 from dotenv import load_dotenv
+from images import UPLOAD_DIR, store_image, image_url, start_server
 load_dotenv()
 
 # -----------------------------
@@ -26,9 +26,11 @@ dspy.settings.configure(lm=llm)
 ADMIN_CREDENTIALS = {"admin": "adminpass"}
 USERS = {"user": "userpass"}
 EVENTS_FILE = "events.json"
-UPLOAD_DIR = "uploads"
 os.makedirs(UPLOAD_DIR, exist_ok=True)
 
+# Cacheable image endpoint (see images.py)
+start_server()
+
 st.set_page_config(page_title="Event Organizer", layout="wide")
 
 # -----------------------------
@@ -47,17 +49,6 @@ def save_events(events):
     with open(EVENTS_FILE, "w", encoding="utf-8") as f:
         json.dump(events, f, ensure_ascii=False, indent=2, default=str)
 
-def image_to_base64(file_path):
-    try:
-        with open(file_path, "rb") as f:
-            encoded = base64.b64encode(f.read()).decode()
-            mime = "image/png"
-            if file_path.lower().endswith((".jpg", ".jpeg")):
-                mime = "image/jpeg"
-            return f"data:{mime};base64,{encoded}"
-    except:
-        return ""
-
 def ensure_session():
     if "events" not in st.session_state:
         st.session_state.events = load_events()
@@ -198,13 +189,10 @@ if st.session_state.role == "admin":
         if submitted:
             event_id = int(datetime.now().timestamp() * 1000)
 
-            img_data_url = ""
+            img_name = ""
             if img:
                 ext = os.path.splitext(img.name)[1]
-                img_path = os.path.join(UPLOAD_DIR, f"{event_id}{ext}")
-                with open(img_path, "wb") as f:
-                    f.write(img.getbuffer())
-                img_data_url = image_to_base64(img_path)
+                img_name = store_image(img.getvalue(), ext)
 
             event = {
                 "id": event_id,
@@ -216,7 +204,7 @@ if st.session_state.role == "admin":
                 "price": float(price),
                 "organizer": organizer,
                 "description": description,
-                "image": img_data_url,
+                "image": img_name,
             }
 
             st.session_state.events.append(event)
@@ -273,7 +261,7 @@ def render_event_cards(events_list):
     <div class="grid">
     """
     for e in events_list:
-        img_html = f"<img src='{e['image']}'/>" if e.get("image") else ""
+        img_html = f"<img src='{image_url(e['image'])}'/>" if e.get("image") else ""
         card = f"""
         <div class="card">
             {img_html}
@@ -3,7 +3,8 @@
 import streamlit as st
 import streamlit.components.v1 as components
 from datetime import datetime, date, time, timedelta
-import json, os, base64, time as t
+import json, os, time as t
+from images import UPLOAD_DIR, store_image, image_url, start_server
 
 # --------------------------------------
 # REDIS REAL-TIME CHAT (SAFE SECRETS)
@@ -22,12 +23,14 @@ ADMIN_CREDENTIALS = {"admin": "adminpass"}
 USERS = {"user": "userpass"}
 
 EVENTS_FILE = "events.json"
-UPLOAD_DIR = "uploads"
 CHAT_DIR = "chat"  # unused but kept for compatibility
 
 os.makedirs(UPLOAD_DIR, exist_ok=True)
 os.makedirs(CHAT_DIR, exist_ok=True)
 
+# cacheable image endpoint (see images.py)
+start_server()
+
 st.set_page_config(page_title="Event Organizer", layout="wide")
 
 # CSS
@@ -52,17 +55,6 @@ def load_events():
 def save_events(events):
     json.dump(events, open(EVENTS_FILE, "w"), indent=2)
 
-def img64(path):
-    try:
-        b = open(path, "rb").read()
-        enc = base64.b64encode(b).decode()
-        mime = "image/png"
-        if path.lower().endswith(".jpg") or path.lower().endswith(".jpeg"):
-            mime = "image/jpeg"
-        return f"data:{mime};base64,{enc}"
-    except:
-        return ""
-
 # -----------------------------
 # REDIS CHAT STORAGE (FIXED)
 # -----------------------------
@@ -198,14 +190,11 @@ if st.session_state.role == "admin":
 
         if submit:
             eid = int(datetime.now().timestamp() * 1000)
-            encoded = ""
+            img_name = ""
 
             if img:
                 ext = os.path.splitext(img.name)[1]
-                pth = os.path.join(UPLOAD_DIR, f"{eid}{ext}")
-                with open(pth, "wb") as f:
-                    f.write(img.getbuffer())
-                encoded = img64(pth)
+                img_name = store_image(img.getvalue(), ext)
 
             st.session_state.events.append({
                 "id": eid,
@@ -218,7 +207,7 @@ if st.session_state.role == "admin":
                 "capacity": int(cap),
                 "hours": float(hours),
                 "description": desc,
-                "image": encoded,
+                "image": img_name,
             })
 
             save_events(st.session_state.events)
@@ -274,7 +263,7 @@ def render(events):
     def card_html(e):
         s = compute_status(e)
         img_html = (
-            f'<img src="{e["image"]}" style="width:100%;height:170px;object-fit:contain;border-radius:8px;margin-bottom:8px;" />'
+            f'<img src="{image_url(e["image"])}" style="width:100%;height:170px;object-fit:contain;border-radius:8px;margin-bottom:8px;" />'
             if e.get("image") else ""
         )
         return f"""
@@ -337,7 +326,10 @@ if st.session_state.page == "event_page" and st.session_state.selected_event is
 
         with cols_top[1]:
             if event.get("image"):
-                st.image(event["image"], use_container_width=True)
+                st.markdown(
+                    f'<img src="{image_url(event["image"])}" style="width:100%;border-radius:8px;" />',
+                    unsafe_allow_html=True,
+                )
 
         st.write("----")
         st.subheader("💬 Event Chat Room (Real-Time)")